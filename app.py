@@ -4,6 +4,7 @@ from flask import Flask, render_template, request, jsonify
 from carbon_calculator import calculate_carbon_footprint
 from web_carbon_calculator import calculate_website_carbon_footprint, extract_website_text
 from chatbot import get_chatbot_response
+from website_monitor import reaudit_website, get_website_history
 
 # Create the Flask application
 app = Flask(__name__)
@@ -81,6 +82,38 @@ def calculate_website():
             "error": str(e)
         }), 400
 
+@app.route('/monitor-website', methods=['POST'])
+def monitor_website():
+    """API endpoint for incremental re-audits of tracked websites"""
+    try:
+        data = request.json
+        
+        # Extract form data
+        website_url = data.get('website_url', '')
+        monthly_views = int(data.get('monthly_views', 0))
+        
+        if not website_url:
+            return jsonify({
+                "success": False,
+                "error": "Please enter a website URL"
+            }), 400
+        
+        # Re-audit the website, skipping recomputation if it is unchanged
+        result = reaudit_website(website_url, monthly_views)
+        result['history'] = get_website_history(website_url)
+        
+        logger.debug(f"Website monitor result: {result['audit']}")
+        return jsonify({
+            "success": True,
+            "result": result
+        })
+    except Exception as e:
+        logger.error(f"Error in website monitoring: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
+
 @app.route('/gemini-chat', methods=['POST'])
 def chat():
     print("==== /gemini-chat endpoint HIT ====")
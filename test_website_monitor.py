@@ -0,0 +1,193 @@
+import pytest
+import requests
+
+import website_monitor
+from website_monitor import (
+    get_tracked_websites,
+    get_website_history,
+    reaudit_tracked_websites,
+    reaudit_website,
+)
+
+URL = "http://example.com/"
+PAGE = b"<html><body><article><p>" + b"Some article text. " * 40 + b"</p></article></body></html>"
+
+
+class FakeResponse:
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.text = content.decode()
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(str(self.status_code))
+
+
+class ResponseQueue(list):
+    """Responses returned in order by the patched requests.get"""
+
+    def __init__(self):
+        super().__init__()
+        self.sent_headers = []
+
+
+@pytest.fixture(autouse=True)
+def monitor_db(monkeypatch, tmp_path):
+    monkeypatch.setattr(website_monitor, "MONITOR_DB_PATH", str(tmp_path / "monitor.db"))
+
+
+@pytest.fixture
+def responses(monkeypatch):
+    queue = ResponseQueue()
+
+    def fake_get(url, timeout=None, headers=None):
+        queue.sent_headers.append(headers or {})
+        response = queue.pop(0)
+        # A callable entry runs another audit while this fetch is in flight
+        if callable(response):
+            response = response()
+        return response
+
+    monkeypatch.setattr(website_monitor.requests, "get", fake_get)
+    return queue
+
+
+@pytest.fixture
+def count_extractions(monkeypatch):
+    calls = []
+    original = website_monitor.extract_text_from_html
+
+    def counting(html):
+        calls.append(html)
+        return original(html)
+
+    monkeypatch.setattr(website_monitor, "extract_text_from_html", counting)
+    return calls
+
+
+def ok(content=PAGE, etag='"v1"'):
+    return FakeResponse(200, content, {"ETag": etag})
+
+
+def test_first_audit_tracks_website(responses):
+    responses.append(ok())
+    result = reaudit_website(URL, 500000)
+    assert result["changed"] is True
+    assert result["monthly_views"] == 500000
+    assert "Some article text." in result["website_text_preview"]
+    assert len(get_website_history(URL)) == 1
+
+
+def test_not_modified_skips_extraction_and_keeps_views(responses, count_extractions):
+    responses.extend([ok(), FakeResponse(304)])
+    first = reaudit_website(URL, 500000)
+    result = reaudit_tracked_websites()[URL]
+    assert responses.sent_headers[1]["If-None-Match"] == '"v1"'
+    assert len(count_extractions) == 1
+    assert result["changed"] is False
+    assert result["monthly_views"] == 500000
+    assert result["monthly_carbon"] == first["monthly_carbon"]
+    assert result["audit"]["monthly_carbon_delta"] == 0.0
+
+
+def test_unchanged_hash_skips_extraction(responses, count_extractions):
+    responses.extend([ok(), ok(etag='"v2"')])
+    reaudit_website(URL)
+    result = reaudit_website(URL)
+    assert result["changed"] is False
+    assert len(count_extractions) == 1
+    responses.append(FakeResponse(304))
+    reaudit_website(URL)
+    assert responses.sent_headers[2]["If-None-Match"] == '"v2"'
+
+
+def test_changed_content_recomputes_footprint(responses, count_extractions):
+    responses.extend([ok(), ok(PAGE * 50, etag='"v2"')])
+    first = reaudit_website(URL, 500000)
+    result = reaudit_website(URL)
+    assert result["changed"] is True
+    assert len(count_extractions) == 2
+    assert result["monthly_carbon"] > first["monthly_carbon"]
+    assert result["audit"]["monthly_carbon_delta"] == round(result["monthly_carbon"] - first["monthly_carbon"], 2)
+
+
+def test_views_change_uses_unrounded_size(responses):
+    responses.extend([ok(), FakeResponse(304)])
+    reaudit_website(URL, 10000)
+    result = reaudit_website(URL, 500000)
+    expected = website_monitor.calculate_carbon_from_size(len(PAGE) / (1024 * 1024), 500000)
+    assert result["changed"] is False
+    assert result["monthly_carbon"] == expected["monthly_carbon"] > 0
+
+
+def test_not_modified_for_untracked_website_is_an_error(responses):
+    responses.append(FakeResponse(304))
+    with pytest.raises(requests.exceptions.HTTPError):
+        reaudit_website(URL)
+    assert get_website_history(URL) == []
+
+
+def test_beautifulsoup_fallback(responses, monkeypatch):
+    monkeypatch.setattr(website_monitor, "extract_text_from_html", lambda html: None)
+    responses.append(ok(b"<html><body><div>Short fallback text</div></body></html>"))
+    assert reaudit_website(URL)["website_text_preview"] == "Short fallback text"
+
+
+def test_history_is_capped(responses, monkeypatch):
+    monkeypatch.setattr(website_monitor, "MAX_HISTORY", 3)
+    responses.extend([ok()] + [FakeResponse(304)] * 4)
+    for _ in range(5):
+        reaudit_website(URL)
+    assert len(get_website_history(URL)) == 3
+
+
+def test_tracked_sites_are_limited(responses, monkeypatch):
+    monkeypatch.setattr(website_monitor, "MAX_TRACKED_SITES", 1)
+    responses.extend([ok(), FakeResponse(304)])
+    reaudit_website(URL)
+    with pytest.raises(ValueError):
+        reaudit_website("http://other.example.com/")
+    assert reaudit_website(URL)["changed"] is False
+
+
+def interleaved(audit, response):
+    """Run another audit during the fetch, then return the fetched response"""
+    def run():
+        audit()
+        return response
+    return run
+
+
+def test_scheduler_run_keeps_websites_added_meanwhile(responses):
+    other = "http://b.com/"
+    responses.append(ok())
+    reaudit_website(URL)
+    # While the scheduler fetches URL, a web request starts tracking b.com
+    responses.extend([interleaved(lambda: reaudit_website(other), FakeResponse(304)), ok()])
+    results = reaudit_tracked_websites(max_workers=1)
+    assert results[URL]["changed"] is False
+    assert get_tracked_websites() == [other, URL]
+    assert len(get_website_history(other)) == 1
+    assert len(get_website_history(URL)) == 2
+
+
+def test_concurrent_audits_of_same_website_keep_both_entries(responses):
+    responses.append(ok())
+    reaudit_website(URL, 500000)
+    responses.extend([interleaved(lambda: reaudit_website(URL), FakeResponse(304)), FakeResponse(304)])
+    reaudit_website(URL)
+    history = get_website_history(URL)
+    assert len(history) == 3
+    assert [entry["monthly_carbon_delta"] for entry in history] == [0.0, 0.0, 0.0]
+
+
+def test_tracking_limit_is_rechecked_on_write(responses, monkeypatch):
+    monkeypatch.setattr(website_monitor, "MAX_TRACKED_SITES", 1)
+    other = "http://b.com/"
+    # Both audits pass the first check before either website is stored
+    responses.extend([interleaved(lambda: reaudit_website(other), ok()), ok()])
+    with pytest.raises(ValueError):
+        reaudit_website(URL)
+    assert get_tracked_websites() == [other]
@@ -19,6 +19,26 @@ CARBON_FACTORS = {
     'default_monthly_views': 10000
 }
 
+def get_response_size_mb(response):
+    """
+    Get the size of a fetched response in MB
+    
+    Args:
+        response: requests Response object for the fetched page
+    
+    Returns:
+        Size of the response in MB
+    """
+    # Get content length in bytes from headers if available
+    content_length = response.headers.get('Content-Length')
+    
+    if content_length:
+        # Convert bytes to MB
+        return int(content_length) / (1024 * 1024)
+    
+    # If Content-Length header is not available, use the actual response size
+    return len(response.content) / (1024 * 1024)
+
 def get_website_size(url):
     """
     Get the size of a website in MB by fetching the content
@@ -38,15 +58,7 @@ def get_website_size(url):
         response = requests.get(url, timeout=10)
         response.raise_for_status()
         
-        # Get content length in bytes from headers if available
-        content_length = response.headers.get('Content-Length')
-        
-        if content_length:
-            # Convert bytes to MB
-            size_mb = int(content_length) / (1024 * 1024)
-        else:
-            # If Content-Length header is not available, use the actual response size
-            size_mb = len(response.content) / (1024 * 1024)
+        size_mb = get_response_size_mb(response)
             
         logger.debug(f"Website size: {size_mb:.2f} MB")
         return size_mb
@@ -56,6 +68,28 @@ def get_website_size(url):
         # Return default page size if we can't determine the actual size
         return CARBON_FACTORS['default_page_size_mb']
 
+def extract_text_from_html(html):
+    """
+    Extract a preview of the main text content from already downloaded HTML
+    using trafilatura
+    
+    Args:
+        html: HTML content of the page
+        
+    Returns:
+        Text preview of the page, or None if extraction failed
+    """
+    # Extract the text content
+    text = trafilatura.extract(html)
+    
+    if not text:
+        return None
+        
+    # Get a preview of the text for the website carbon calculator
+    if len(text) > 500:
+        return text[:500] + "..."
+    return text
+
 def get_website_text_content(url):
     """
     This function takes a URL and returns the main text content of the website
@@ -76,16 +110,10 @@ def get_website_text_content(url):
         downloaded = trafilatura.fetch_url(url)
         
         if downloaded:
-            # Extract the text content
-            text = trafilatura.extract(downloaded)
+            preview = extract_text_from_html(downloaded)
             
-            if text:
+            if preview:
                 logger.debug(f"Successfully extracted text with Trafilatura from {url}")
-                # Get a preview of the text for the website carbon calculator
-                if len(text) > 500:
-                    preview = text[:500] + "..."
-                else:
-                    preview = text
                 return preview
                 
         logger.warning(f"Trafilatura extraction returned empty for {url}")
@@ -95,6 +123,45 @@ def get_website_text_content(url):
         logger.error(f"Error using Trafilatura for {url}: {str(e)}")
         return None
 
+def extract_text_with_beautifulsoup(html):
+    """
+    Extract a preview of the text content from already downloaded HTML
+    using BeautifulSoup
+    
+    Args:
+        html: HTML content of the page
+    
+    Returns:
+        Text preview of the page
+    """
+    # Parse the HTML
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    # Remove non-content elements
+    for element in soup(['script', 'style', 'header', 'footer', 'nav', 'aside']):
+        element.decompose()
+        
+    # Get text and clean it up
+    text = soup.get_text(separator=' ')
+    
+    # Clean up whitespace
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    text = '\n'.join(chunk for chunk in chunks if chunk)
+    
+    # Remove excess whitespace
+    text = re.sub(r'\s+', ' ', text).strip()
+    
+    # Get a preview of the text
+    if not text:
+        return "No text content could be extracted from this website."
+        
+    # Take first 500 characters as preview
+    preview = text[:500]
+    if len(text) > 500:
+        preview += "..."
+    return preview
+
 def extract_website_text(url):
     """
     Extract the text content of a website using Trafilatura first,
@@ -128,33 +195,7 @@ def extract_website_text(url):
         response = requests.get(url, timeout=10, headers=headers)
         response.raise_for_status()
         
-        # Parse the HTML
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Remove non-content elements
-        for element in soup(['script', 'style', 'header', 'footer', 'nav', 'aside']):
-            element.decompose()
-            
-        # Get text and clean it up
-        text = soup.get_text(separator=' ')
-        
-        # Clean up whitespace
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = '\n'.join(chunk for chunk in chunks if chunk)
-        
-        # Remove excess whitespace
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        # Get a preview of the text
-        if text:
-            # Take first 500 characters as preview
-            preview = text[:500]
-            if len(text) > 500:
-                preview += "..."
-            return preview
-        else:
-            return "No text content could be extracted from this website."
+        return extract_text_with_beautifulsoup(response.content)
             
     except Exception as e:
         logger.error(f"Error extracting website text: {str(e)}")
@@ -179,36 +220,50 @@ def calculate_website_carbon_footprint(url, monthly_views=None):
         # Get website size
         website_size_mb = get_website_size(url)
         
-        # Convert MB to GB for calculation
-        website_size_gb = website_size_mb / 1024
-        
-        # Calculate carbon per visit (data transfer + server energy)
-        # Data transfer carbon
-        data_carbon = website_size_gb * CARBON_FACTORS['data_transfer']
-        
-        # Estimated server energy (assuming 0.2 kWh per GB as a rough estimate)
-        server_energy_kwh = website_size_gb * 0.2
-        server_carbon = server_energy_kwh * CARBON_FACTORS['server_energy']
-        
-        # Total per visit
-        carbon_per_visit = data_carbon + server_carbon
-        
-        # Monthly and annual carbon
-        monthly_carbon = carbon_per_visit * monthly_views
-        annual_carbon = monthly_carbon * 12
-        
-        # Round results for readability
-        results = {
-            "website_size_mb": round(website_size_mb, 2),
-            "carbon_per_visit": round(carbon_per_visit * 1000, 2),  # convert to grams for readability
-            "monthly_carbon": round(monthly_carbon, 2),
-            "annual_carbon": round(annual_carbon, 2),
-            "monthly_views": monthly_views
-        }
+        results = calculate_carbon_from_size(website_size_mb, monthly_views)
         
         logger.debug(f"Website carbon calculation results: {results}")
         return results
         
     except Exception as e:
         logger.error(f"Error calculating website carbon footprint: {str(e)}")
-        raise
\ No newline at end of file
+        raise
+
+def calculate_carbon_from_size(website_size_mb, monthly_views):
+    """
+    Calculate the carbon footprint of a website from its page size
+    
+    Args:
+        website_size_mb: Size of the page in MB
+        monthly_views: Estimated monthly page views
+    
+    Returns:
+        Dictionary with carbon footprint results in kg CO2e
+    """
+    # Convert MB to GB for calculation
+    website_size_gb = website_size_mb / 1024
+    
+    # Calculate carbon per visit (data transfer + server energy)
+    # Data transfer carbon
+    data_carbon = website_size_gb * CARBON_FACTORS['data_transfer']
+    
+    # Estimated server energy (assuming 0.2 kWh per GB as a rough estimate)
+    server_energy_kwh = website_size_gb * 0.2
+    server_carbon = server_energy_kwh * CARBON_FACTORS['server_energy']
+    
+    # Total per visit
+    carbon_per_visit = data_carbon + server_carbon
+    
+    # Monthly and annual carbon
+    monthly_carbon = carbon_per_visit * monthly_views
+    annual_carbon = monthly_carbon * 12
+    
+    # Round results for readability
+    results = {
+        "website_size_mb": round(website_size_mb, 2),
+        "carbon_per_visit": round(carbon_per_visit * 1000, 2),  # convert to grams for readability
+        "monthly_carbon": round(monthly_carbon, 2),
+        "annual_carbon": round(annual_carbon, 2),
+        "monthly_views": monthly_views
+    }
+    return results
@@ -0,0 +1,292 @@
+"""
+Incremental re-auditing of tracked websites.
+
+Each tracked URL keeps its validators (ETag / Last-Modified), a content hash
+and a history of audits. Re-audits use conditional GETs and only re-run text
+extraction and the carbon calculation when the page content has changed.
+
+Tracked websites are stored in SQLite, one row per URL, so the web app, its
+workers and the scheduler can audit websites at the same time and each audit
+only reads and writes its own website.
+
+Run this module directly to re-audit every tracked website, e.g. from cron.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+import requests
+
+from web_carbon_calculator import (
+    CARBON_FACTORS,
+    calculate_carbon_from_size,
+    extract_text_from_html,
+    extract_text_with_beautifulsoup,
+    get_response_size_mb,
+)
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of audits kept in the history of each tracked URL
+MAX_HISTORY = 100
+
+# Maximum number of websites that can be tracked at once
+MAX_TRACKED_SITES = 5000
+
+# SQLite database the tracked websites are stored in
+MONITOR_DB_PATH = os.environ.get("MONITOR_DB_PATH", "website_monitor.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sites (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT NOT NULL,
+    size_mb REAL NOT NULL,
+    text_preview TEXT,
+    results TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS audits (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    checked_at TEXT NOT NULL,
+    changed INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    website_size_mb REAL NOT NULL,
+    monthly_carbon REAL NOT NULL,
+    monthly_carbon_delta REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS audits_url ON audits (url, id);
+"""
+
+def _connect():
+    """Open a connection to the monitor database, creating the tables if needed"""
+    # Transactions are managed explicitly so writes can take the lock up front
+    conn = sqlite3.connect(MONITOR_DB_PATH, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    return conn
+
+def _normalise_url(url):
+    """Make sure the URL has a scheme so it can be used as a stable key"""
+    if not urlparse(url).scheme:
+        url = 'http://' + url
+    return url
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+def _load_site(conn, url):
+    """Read the stored record of a website, or None if it is not tracked"""
+    row = conn.execute("SELECT * FROM sites WHERE url = ?", (url,)).fetchone()
+    if row is None:
+        return None
+    site = dict(row)
+    site['results'] = json.loads(site['results'])
+    return site
+
+def _conditional_headers(site):
+    """Validators from the previous fetch let the server answer 304"""
+    headers = {}
+    if site:
+        if site.get('etag'):
+            headers['If-None-Match'] = site['etag']
+        if site.get('last_modified'):
+            headers['If-Modified-Since'] = site['last_modified']
+    return headers
+
+def _write_audit(conn, url, record, changed):
+    """
+    Store the new record of a website and append the audit to its history
+
+    Runs in a single write transaction so concurrent audits of the same or
+    other websites, from any process, never overwrite each other.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Re-checked here as other audits may have added websites meanwhile
+        if _load_site(conn, url) is None:
+            (tracked,) = conn.execute("SELECT COUNT(*) FROM sites").fetchone()
+            if tracked >= MAX_TRACKED_SITES:
+                raise ValueError(f"Cannot track more than {MAX_TRACKED_SITES} websites")
+
+        conn.execute(
+            """INSERT INTO sites (url, etag, last_modified, content_hash, size_mb, text_preview, results)
+               VALUES (:url, :etag, :last_modified, :content_hash, :size_mb, :text_preview, :results)
+               ON CONFLICT (url) DO UPDATE SET
+                   etag = excluded.etag,
+                   last_modified = excluded.last_modified,
+                   content_hash = excluded.content_hash,
+                   size_mb = excluded.size_mb,
+                   text_preview = excluded.text_preview,
+                   results = excluded.results""",
+            {**record, "url": url, "results": json.dumps(record['results'])}
+        )
+
+        # The delta is taken against the newest stored audit, whoever wrote it
+        last = conn.execute(
+            "SELECT monthly_carbon FROM audits WHERE url = ? ORDER BY id DESC LIMIT 1", (url,)
+        ).fetchone()
+        results = record['results']
+        entry = {
+            "checked_at": _now(),
+            "changed": changed,
+            "content_hash": record['content_hash'],
+            "website_size_mb": results['website_size_mb'],
+            "monthly_carbon": results['monthly_carbon'],
+            "monthly_carbon_delta": round(results['monthly_carbon'] - last['monthly_carbon'], 2) if last else 0.0
+        }
+        conn.execute(
+            """INSERT INTO audits (url, checked_at, changed, content_hash, website_size_mb, monthly_carbon, monthly_carbon_delta)
+               VALUES (:url, :checked_at, :changed, :content_hash, :website_size_mb, :monthly_carbon, :monthly_carbon_delta)""",
+            {**entry, "url": url}
+        )
+        conn.execute(
+            """DELETE FROM audits WHERE url = ? AND id NOT IN
+                   (SELECT id FROM audits WHERE url = ? ORDER BY id DESC LIMIT ?)""",
+            (url, url, MAX_HISTORY)
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return entry
+
+def reaudit_website(url, monthly_views=None):
+    """
+    Re-audit a website, only recomputing its footprint when it changed
+
+    Args:
+        url: URL of the website to analyze
+        monthly_views: Estimated monthly page views (defaults to the views of
+            the previous audit, or 10000 for websites not tracked yet)
+
+    Returns:
+        Dictionary with the carbon footprint results, the text preview,
+        whether the content changed and the latest history entry
+    """
+    url = _normalise_url(url)
+
+    with closing(_connect()) as conn:
+        previous = _load_site(conn, url)
+        if previous is None:
+            (tracked,) = conn.execute("SELECT COUNT(*) FROM sites").fetchone()
+            if tracked >= MAX_TRACKED_SITES:
+                raise ValueError(f"Cannot track more than {MAX_TRACKED_SITES} websites")
+
+    if monthly_views is None or monthly_views <= 0:
+        if previous:
+            monthly_views = previous['results']['monthly_views']
+        else:
+            monthly_views = CARBON_FACTORS['default_monthly_views']
+
+    response = requests.get(url, timeout=10, headers=_conditional_headers(previous))
+
+    if response.status_code == 304:
+        if not previous:
+            raise requests.exceptions.HTTPError(f"Unexpected 304 response for untracked website {url}")
+        logger.debug(f"{url} not modified since last audit")
+        record = {
+            "etag": previous['etag'],
+            "last_modified": previous['last_modified'],
+            "content_hash": previous['content_hash'],
+            "size_mb": previous['size_mb'],
+            "text_preview": previous['text_preview'],
+            "results": previous['results']
+        }
+    else:
+        response.raise_for_status()
+        record = {
+            "content_hash": hashlib.sha256(response.content).hexdigest(),
+            "size_mb": get_response_size_mb(response),
+            "etag": response.headers.get('ETag'),
+            "last_modified": response.headers.get('Last-Modified')
+        }
+        if previous and previous['content_hash'] == record['content_hash']:
+            record['text_preview'] = previous['text_preview']
+            record['results'] = previous['results']
+        else:
+            logger.info(f"Content of {url} changed, recomputing footprint")
+            record['text_preview'] = (extract_text_from_html(response.text)
+                                      or extract_text_with_beautifulsoup(response.content))
+            record['results'] = None
+
+    changed = previous is None or previous['content_hash'] != record['content_hash']
+
+    if record['results'] is None or record['results']['monthly_views'] != monthly_views:
+        # New content or different traffic, re-run the carbon math
+        record['results'] = calculate_carbon_from_size(record['size_mb'], monthly_views)
+
+    with closing(_connect()) as conn:
+        entry = _write_audit(conn, url, record, changed)
+
+    return {
+        **record['results'],
+        "website_text_preview": record['text_preview'],
+        "changed": changed,
+        "audit": entry
+    }
+
+def reaudit_tracked_websites(monthly_views=None, max_workers=8):
+    """
+    Re-audit every tracked website concurrently
+
+    Args:
+        monthly_views: Estimated monthly page views applied to every site
+            (defaults to the views of each site's previous audit)
+        max_workers: Number of websites fetched in parallel
+
+    Returns:
+        Dictionary mapping each URL to its re-audit result or error message
+    """
+    urls = get_tracked_websites()
+
+    def audit(url):
+        try:
+            return reaudit_website(url, monthly_views)
+        except Exception as e:
+            logger.error(f"Error re-auditing {url}: {str(e)}")
+            return {"error": str(e)}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(urls, executor.map(audit, urls)))
+
+def get_tracked_websites():
+    """
+    Get the URLs of every tracked website
+
+    Returns:
+        List of tracked URLs
+    """
+    with closing(_connect()) as conn:
+        return [row['url'] for row in conn.execute("SELECT url FROM sites ORDER BY url")]
+
+def get_website_history(url):
+    """
+    Get the audit history of a tracked website
+
+    Args:
+        url: URL of the tracked website
+
+    Returns:
+        List of audit entries, oldest first (empty if the URL is not tracked)
+    """
+    with closing(_connect()) as conn:
+        rows = conn.execute(
+            """SELECT checked_at, changed, content_hash, website_size_mb, monthly_carbon, monthly_carbon_delta
+               FROM audits WHERE url = ? ORDER BY id""",
+            (_normalise_url(url),)
+        )
+        return [{**row, "changed": bool(row['changed'])} for row in map(dict, rows)]
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    results = reaudit_tracked_websites()
+    failed = sum(1 for result in results.values() if 'error' in result)
+    logger.info(f"Re-audited {len(results)} websites, {failed} failed")